@@ -1,10 +1,17 @@
+import os
+
 from flask import Flask, render_template, request, redirect, url_for, flash
 from flask_sqlalchemy import SQLAlchemy
 
+from profiler import SamplingProfiler
+
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///todos.db'
 app.secret_key = 'key'
+# Set PROFILER_TOKEN to enable the /_profiler/* endpoints
+app.config['PROFILER_TOKEN'] = os.environ.get('PROFILER_TOKEN')
 db = SQLAlchemy(app)
+profiler = SamplingProfiler(app)
 
 class Todo(db.Model):
     id = db.Column(db.Integer, primary_key=True)
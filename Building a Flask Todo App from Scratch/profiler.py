@@ -0,0 +1,188 @@
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, jsonify, request
+
+
+class SamplingProfiler:
+    """
+    Low-overhead sampling profiler that can be switched on at runtime.
+
+    While a profiling window is open, a background thread wakes up `rate`
+    times per second, grabs the current stack of every thread that is
+    handling a request and counts it under the matched Flask endpoint.
+    Stacks are walked only from the innermost frame up to the view function
+    (the framework frames above it are the same for every sample), capped at
+    PROFILER_MAX_DEPTH, and a thread still at the same spot as in the previous
+    sample reuses that sample's stack instead of walking it again.
+    Output is in collapsed-stack format ("a;b;c 42"), which flamegraph.pl
+    and speedscope read directly.
+
+    Endpoints (all require the X-Profiler-Token header to match PROFILER_TOKEN,
+    and are disabled when no token is configured):
+        POST /_profiler/start?seconds=30&rate=50
+        POST /_profiler/stop
+        GET  /_profiler/flamegraph
+    """
+
+    def __init__(self, app=None):
+        self.samples = Counter()
+        self.sample_count = 0
+        self.cpu_time = 0.0        # CPU seconds spent by the sampler thread itself
+        self._active = {}          # thread ident -> (endpoint, view code object)
+        self._last = {}            # thread ident -> (frame id, code, lasti, stack)
+        self.max_depth = 64
+        self._labels = {}          # code object -> "func (file:line)"
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()   # start/stop must not interleave
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILER_TOKEN', None)
+        app.config.setdefault('PROFILER_DEFAULT_RATE', 50)       # samples per second
+        app.config.setdefault('PROFILER_DEFAULT_SECONDS', 30)
+        app.config.setdefault('PROFILER_MAX_SECONDS', 300)
+        app.config.setdefault('PROFILER_MAX_DEPTH', 64)          # frames per sample
+        self.max_depth = app.config['PROFILER_MAX_DEPTH']
+
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule('/_profiler/start', 'profiler_start', self._start_view, methods=['POST'])
+        app.add_url_rule('/_profiler/stop', 'profiler_stop', self._stop_view, methods=['POST'])
+        app.add_url_rule('/_profiler/flamegraph', 'profiler_flamegraph', self._flamegraph_view)
+        app.extensions['sampling_profiler'] = self
+
+    # ---------- request tracking ----------
+
+    def _before_request(self):
+        if request.endpoint and not request.endpoint.startswith('profiler_'):
+            view = current_app.view_functions.get(request.endpoint)
+            self._active[threading.get_ident()] = (request.endpoint, getattr(view, '__code__', None))
+
+    def _teardown_request(self, exc=None):
+        ident = threading.get_ident()
+        self._active.pop(ident, None)
+        self._last.pop(ident, None)
+
+    # ---------- sampling ----------
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds, rate):
+        """Open a profiling window. Previous samples are discarded."""
+        with self._lock:
+            if self.running:
+                return False
+            self.samples = Counter()
+            self.sample_count = 0
+            self.cpu_time = 0.0
+            self._last = {}
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(1.0 / rate, time.monotonic() + seconds),
+                name='sampling-profiler', daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def stop(self):
+        with self._lock:
+            self._stop.set()
+            if self._thread is not None:
+                self._thread.join()
+
+    def _run(self, interval, deadline):
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            started = time.thread_time()
+            self._sample()
+            self.cpu_time += time.thread_time() - started
+            self._stop.wait(interval)
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            filename = os.path.basename(code.co_filename)
+            label = self._labels[code] = f'{code.co_name} ({filename}:{code.co_firstlineno})'
+        return label
+
+    def _sample(self):
+        frames = sys._current_frames()
+        max_depth = self.max_depth
+        for ident, (endpoint, view_code) in list(self._active.items()):
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            # Same frame at the same instruction as last time - nothing to walk.
+            # Only ids are kept, never the frame, so its locals are not held alive.
+            spot = (id(frame), frame.f_code, frame.f_lasti)
+            last = self._last.get(ident)
+            if last is not None and last[:3] == spot:
+                stack = last[3]
+            else:
+                # Keep raw code objects here; turning them into text is left to collapsed()
+                codes = [endpoint]
+                while frame is not None and len(codes) <= max_depth:
+                    code = frame.f_code
+                    codes.append(code)
+                    if code is view_code:
+                        break
+                    frame = frame.f_back
+                stack = tuple(codes)
+                self._last[ident] = spot + (stack,)
+            self.samples[stack] += 1
+        self.sample_count += 1
+
+    def collapsed(self):
+        """Samples in collapsed-stack format, one "stack count" per line."""
+        lines = []
+        samples = Counter(dict(self.samples))  # copy - the sampler may still be adding
+        for stack, count in samples.most_common():
+            endpoint, codes = stack[0], stack[:0:-1]  # root frame first
+            labels = ';'.join(self._label(code) for code in codes)
+            lines.append(f'{endpoint};{labels} {count}\n')
+        return ''.join(lines)
+
+    # ---------- endpoints ----------
+
+    def _authorized(self):
+        token = current_app.config['PROFILER_TOKEN']
+        given = request.headers.get('X-Profiler-Token', '')
+        return bool(token) and hmac.compare_digest(given.encode(), token.encode())
+
+    def _start_view(self):
+        if not self._authorized():
+            return jsonify({'error': 'Not found'}), 404
+        config = current_app.config
+        try:
+            seconds = float(request.args.get('seconds', config['PROFILER_DEFAULT_SECONDS']))
+            rate = float(request.args.get('rate', config['PROFILER_DEFAULT_RATE']))
+        except ValueError:
+            return jsonify({'error': 'seconds and rate must be numbers'}), 400
+        if not 0 < seconds <= config['PROFILER_MAX_SECONDS'] or not 0 < rate <= 1000:
+            return jsonify({'error': 'seconds or rate out of range'}), 400
+        if not self.start(seconds, rate):
+            return jsonify({'error': 'Profiler already running'}), 409
+        return jsonify({'message': f'Profiling for {seconds:g}s at {rate:g} Hz'})
+
+    def _stop_view(self):
+        if not self._authorized():
+            return jsonify({'error': 'Not found'}), 404
+        self.stop()
+        return jsonify({
+            'message': 'Profiler stopped',
+            'samples': self.sample_count,
+            'sampler_cpu_seconds': round(self.cpu_time, 4)
+        })
+
+    def _flamegraph_view(self):
+        if not self._authorized():
+            return jsonify({'error': 'Not found'}), 404
+        return current_app.response_class(self.collapsed(), mimetype='text/plain')
@@ -0,0 +1,181 @@
+import math
+import threading
+import time
+
+from flask import current_app, g, jsonify, request
+
+
+# ============================================
+# PER-ROUTE LIMITER
+# ============================================
+
+class RouteLimiter:
+    """
+    Concurrency budget for a single route.
+    - At most `limit` requests run at the same time
+    - Up to `queue_size` more requests wait for a free slot
+    - A waiting request gives up after `timeout` seconds
+    When `target_latency` is set the limit adapts with AIMD:
+    fast responses add 1/limit, a slow response multiplies by `backoff`.
+    """
+
+    def __init__(self, concurrency, queue_size=0, timeout=0.0, target_latency=None,
+                 min_concurrency=1, max_concurrency=None, backoff=0.9):
+        self.limit = float(concurrency)
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.target_latency = target_latency
+        self.min_limit = float(min_concurrency)
+        self.max_limit = float(max_concurrency or concurrency)
+        self.backoff = backoff
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def _slots(self):
+        return max(1, int(self.limit))
+
+    def acquire(self):
+        """Take a slot. Returns False if the queue is full or the deadline passes."""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            # Fast path - only when nobody is queued, so waiters keep their turn
+            if self.waiting == 0 and self.in_flight < self._slots():
+                self.in_flight += 1
+                self.admitted += 1
+                return True
+
+            # Bounded queue - fail fast instead of piling up work
+            if self.waiting >= self.queue_size:
+                self.rejected += 1
+                return False
+
+            self.waiting += 1
+            try:
+                while self.in_flight >= self._slots():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        return False
+                    self._cond.wait(remaining)
+                self.in_flight += 1
+                self.admitted += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self, latency):
+        """Free a slot and feed the observed latency (seconds) into the limit."""
+        with self._cond:
+            self.in_flight -= 1
+            self._adapt(latency)
+            self._cond.notify_all()
+
+    def _adapt(self, latency):
+        if self.target_latency is None:
+            return
+        if latency > self.target_latency:
+            # Multiplicative decrease, at most once per target_latency window so
+            # a batch of requests that were already slow doesn't collapse the limit
+            now = time.monotonic()
+            if now - self._last_decrease >= self.target_latency:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+        else:
+            # Additive increase - roughly +1 per "limit" fast responses
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+            }
+
+
+# ============================================
+# FLASK EXTENSION
+# ============================================
+
+class AdmissionControl:
+    """
+    Flask extension that applies RouteLimiter budgets per endpoint.
+    Routes without a budget are never queued or rejected, so cheap
+    routes (health checks etc.) keep working while heavy ones shed load.
+
+    Usage:
+        admission = AdmissionControl(app)
+
+        @app.route('/users')
+        @admission.limit(concurrency=4, queue_size=8, timeout=0.5)
+        def getUsers(): ...
+
+        # or, without touching the view:
+        admission.set_limit('getUsers', concurrency=4, queue_size=8, timeout=0.5)
+    """
+
+    def __init__(self, app=None):
+        self.limiters = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ADMISSION_RETRY_AFTER', 1)  # seconds
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        app.extensions['admission_control'] = self
+
+    def limit(self, concurrency, **kwargs):
+        """Decorator - attach a budget to a view function."""
+        def decorator(view):
+            view._admission_limiter = RouteLimiter(concurrency, **kwargs)
+            return view
+        return decorator
+
+    def set_limit(self, endpoint, concurrency, **kwargs):
+        """Attach a budget to an endpoint by name (e.g. 'getUsers')."""
+        self.limiters[endpoint] = RouteLimiter(concurrency, **kwargs)
+        return self.limiters[endpoint]
+
+    def get_limiter(self, endpoint):
+        if endpoint is None:
+            return None
+        if endpoint in self.limiters:
+            return self.limiters[endpoint]
+        view = current_app.view_functions.get(endpoint)
+        return getattr(view, '_admission_limiter', None)
+
+    def stats(self):
+        """Current state of every limiter, keyed by endpoint."""
+        result = {name: limiter.stats() for name, limiter in self.limiters.items()}
+        for name, view in current_app.view_functions.items():
+            limiter = getattr(view, '_admission_limiter', None)
+            if limiter is not None and name not in result:
+                result[name] = limiter.stats()
+        return result
+
+    def _before_request(self):
+        limiter = self.get_limiter(request.endpoint)
+        if limiter is None:
+            return None
+        if not limiter.acquire():
+            retry_after = math.ceil(current_app.config['ADMISSION_RETRY_AFTER'])
+            response = jsonify({'error': 'Server overloaded, try again later'})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(retry_after)
+            return response
+        g._admission = (limiter, time.monotonic())
+        return None
+
+    def _teardown_request(self, exc=None):
+        admission = g.pop('_admission', None)
+        if admission is not None:
+            limiter, started = admission
+            limiter.release(time.monotonic() - started)
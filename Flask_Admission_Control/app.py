@@ -0,0 +1,67 @@
+import os
+import time
+
+from flask import Flask, jsonify
+
+from admission import AdmissionControl
+
+
+app = Flask(__name__)
+app.config['ADMISSION_RETRY_AFTER'] = 1
+
+# Set ADMISSION_ENABLED=0 to run the same app without load shedding
+admission = AdmissionControl()
+if os.environ.get('ADMISSION_ENABLED', '1') == '1':
+    admission.init_app(app)
+
+# Fake rows standing in for User/Post tables so the demo needs no database
+USERS = [{"id": i, "name": f"User {i}"} for i in range(500)]
+
+
+def build_user_list():
+    """Simulates getUsers - a database round trip, then one dict per row."""
+    time.sleep(0.05)
+    user_list = []
+    for user in USERS:
+        user_list.append({
+            "id": user["id"],
+            "name": user["name"],
+            "posts": [{"title": f"Post {n}"} for n in range(10)]
+        })
+    return user_list
+
+
+# ============================================
+# ROUTES
+# ============================================
+
+@app.route('/users')
+@admission.limit(concurrency=2, queue_size=4, timeout=0.2,
+                 target_latency=0.25, max_concurrency=4)
+def getUsers():
+    """Heavy route - bounded to a few concurrent requests."""
+    return jsonify({'message': len(build_user_list())})
+
+
+@app.route('/posts')
+@admission.limit(concurrency=2, queue_size=4, timeout=0.2,
+                 target_latency=0.25, max_concurrency=4)
+def get_posts():
+    """Heavy route - same budget as /users, tracked separately."""
+    return jsonify([len(user["posts"]) for user in build_user_list()][:10])
+
+
+@app.route('/admission')
+def admission_stats():
+    """Current limit, in-flight, queue and reject counts per limited route."""
+    return jsonify(admission.stats())
+
+
+@app.route('/')
+def index():
+    """Root route - health check endpoint, never limited."""
+    return jsonify({"message": "Hello, World!"})
+
+
+if __name__ == '__main__':
+    app.run(debug=True, threaded=True)
@@ -0,0 +1,128 @@
+"""
+Overload benchmark for AdmissionControl.
+
+Starts app.py in a separate process (once without and once with admission
+control), saturates the heavy routes (/users, /posts) with many closed-loop
+clients and measures what the cheap health check route (/) sees meanwhile.
+
+Run:
+    python benchmark.py [--duration 10] [--heavy-clients 32] [--cheap-clients 4]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def serve(port):
+    from werkzeug.serving import make_server
+    from app import app
+    make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+
+def start_server(port, enabled):
+    env = dict(os.environ, ADMISSION_ENABLED='1' if enabled else '0')
+    proc = subprocess.Popen(
+        [sys.executable, __file__, '--serve', str(port)],
+        cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f'http://127.0.0.1:{port}/'
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError('server did not start')
+
+
+def client(url, stop, results, think_time):
+    """Closed-loop client: send, wait for the answer, repeat.
+    A 503 is retried only after its Retry-After, like a well-behaved client."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        wait = think_time
+        try:
+            urllib.request.urlopen(url, timeout=30).read()
+            status = 200
+        except urllib.error.HTTPError as e:
+            status = e.code
+            if status == 503:
+                wait = float(e.headers.get('Retry-After', 1))
+        except OSError:
+            status = 0
+        results.append((status, time.perf_counter() - started))
+        if wait:
+            stop.wait(wait)
+
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def summarize(name, results, duration):
+    ok = [latency for status, latency in results if status == 200]
+    shed = sum(1 for status, _ in results if status == 503)
+    errors = len(results) - len(ok) - shed
+    print(f"  {name:<6} goodput {len(ok) / duration:8.1f} req/s   "
+          f"p50 {percentile(ok, 50) * 1000:7.1f} ms   p99 {percentile(ok, 99) * 1000:7.1f} ms   "
+          f"503s {shed:6d}   errors {errors}")
+
+
+def run(port, enabled, args):
+    proc = start_server(port, enabled)
+    base = f'http://127.0.0.1:{port}'
+    stop = threading.Event()
+    heavy, cheap = [], []
+    threads = []
+    for i in range(args.heavy_clients):
+        route = '/users' if i % 2 == 0 else '/posts'
+        threads.append(threading.Thread(target=client, args=(base + route, stop, heavy, 0)))
+    for _ in range(args.cheap_clients):
+        threads.append(threading.Thread(target=client, args=(base + '/', stop, cheap, 0.01)))
+    try:
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    print(f"admission control {'ON' if enabled else 'OFF'}:")
+    summarize('cheap', cheap, args.duration)
+    summarize('heavy', heavy, args.duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--heavy-clients', type=int, default=32)
+    parser.add_argument('--cheap-clients', type=int, default=4)
+    parser.add_argument('--port', type=int, default=5057)
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    run(args.port, False, args)
+    run(args.port + 1, True, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Checks the AdmissionControl behaviour deterministically: bounded queue,
+wait deadline, 503 + Retry-After, unlimited routes staying open, and the
+AIMD limit adaptation. Requests that must stay "in flight" block on an
+Event, so nothing depends on timing luck.
+
+Run:
+    python verify_admission.py
+"""
+import threading
+import time
+
+from flask import Flask, jsonify
+
+from admission import AdmissionControl, RouteLimiter
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached in time")
+        time.sleep(0.005)
+
+
+def make_app(**limit):
+    app = Flask(__name__)
+    app.config['ADMISSION_RETRY_AFTER'] = 3
+    admission = AdmissionControl(app)
+    release = threading.Event()
+
+    @app.route('/heavy')
+    def heavy():
+        release.wait(5)
+        return jsonify({"message": "done"})
+
+    @app.route('/')
+    def index():
+        return jsonify({"message": "Hello, World!"})
+
+    limiter = admission.set_limit('heavy', **limit)
+    return app, limiter, release
+
+
+def background_get(app, path, results):
+    thread = threading.Thread(target=lambda: results.append(app.test_client().get(path).status_code))
+    thread.start()
+    return thread
+
+
+def check_queue_full():
+    app, limiter, release = make_app(concurrency=1, queue_size=1, timeout=5)
+    results = []
+    running = background_get(app, '/heavy', results)
+    wait_until(lambda: limiter.in_flight == 1)
+    queued = background_get(app, '/heavy', results)
+    wait_until(lambda: limiter.waiting == 1)
+
+    started = time.monotonic()
+    response = app.test_client().get('/heavy')
+    assert response.status_code == 503, response.status_code
+    assert response.headers['Retry-After'] == '3', response.headers
+    assert time.monotonic() - started < 1, "queue-full rejection should not wait"
+
+    assert app.test_client().get('/').status_code == 200, "unlimited route must stay open"
+
+    release.set()
+    running.join()
+    queued.join()
+    assert sorted(results) == [200, 200], results
+    assert limiter.in_flight == 0 and limiter.rejected == 1, limiter.stats()
+    print("ok  queue full -> immediate 503 with Retry-After, other routes unaffected")
+
+
+def check_deadline():
+    app, limiter, release = make_app(concurrency=1, queue_size=1, timeout=0.2)
+    results = []
+    running = background_get(app, '/heavy', results)
+    wait_until(lambda: limiter.in_flight == 1)
+
+    started = time.monotonic()
+    response = app.test_client().get('/heavy')
+    waited = time.monotonic() - started
+    assert response.status_code == 503, response.status_code
+    assert 0.2 <= waited < 2, waited
+
+    release.set()
+    running.join()
+    assert results == [200], results
+    print("ok  queued request gives up at its deadline")
+
+
+def check_aimd():
+    limiter = RouteLimiter(2, target_latency=0.1, max_concurrency=3, min_concurrency=1)
+    for _ in range(10):
+        limiter.in_flight += 1
+        limiter.release(0.01)
+    assert limiter.limit == 3, limiter.limit  # additive increase, capped at max
+
+    limiter.in_flight += 1
+    limiter.release(0.5)
+    assert abs(limiter.limit - 2.7) < 1e-9, limiter.limit  # multiplicative decrease
+    limiter.in_flight += 1
+    limiter.release(0.5)
+    assert abs(limiter.limit - 2.7) < 1e-9, "only one decrease per target_latency window"
+
+    for _ in range(20):
+        time.sleep(0.11)
+        limiter.in_flight += 1
+        limiter.release(0.5)
+    assert limiter.limit == 1, limiter.limit  # never below min
+    print("ok  AIMD grows on fast responses, backs off on slow ones, stays in bounds")
+
+
+def main():
+    check_queue_full()
+    check_deadline()
+    check_aimd()
+    print("All admission checks passed.")
+
+
+if __name__ == '__main__':
+    main()
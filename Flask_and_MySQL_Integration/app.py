@@ -1,28 +1,53 @@
-from flask import Flask, jsonify
+import os
+import sys
+
+from flask import Flask, jsonify, session
 import pymysql
 
+from db_router import ConnectionRouter
+
+# The admission control extension lives in ../Flask_Admission_Control
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Flask_Admission_Control'))
+from admission import AdmissionControl
+
 app = Flask(__name__)
+app.secret_key = 'key'  # needed for read-your-writes stickiness (stored in session)
+
+DB_SETTINGS = {
+    'user': 'root',
+    'password': 'Aditya@12345',
+    'database': 'users',  # database name
+    'cursorclass': pymysql.cursors.DictCursor
+}
+PRIMARY_HOST = 'localhost'
+REPLICA_HOSTS = []  # e.g. ['replica1.local', 'replica2.local']
 
-def get_db_connection():
-    return pymysql.connect(
-        host='localhost',
-        user='root',
-        password='Aditya@12345',
-        database='users',  # database name
-        cursorclass=pymysql.cursors.DictCursor
-    )
+def mysql_connector(host):
+    return lambda: pymysql.connect(host=host, **DB_SETTINGS)
+
+# Reads go to replicas (round robin), writes to the primary
+router = ConnectionRouter(
+    primary=mysql_connector(PRIMARY_HOST),
+    replicas=[mysql_connector(host) for host in REPLICA_HOSTS],
+    strategy='round_robin',
+    sticky_seconds=5
+)
+router.start_health_checks(interval=5)
+
+# index() reads the whole table - bound it so a burst can't exhaust MySQL connections
+admission = AdmissionControl(app)
+admission.set_limit('index', concurrency=8, queue_size=16, timeout=0.5,
+                    target_latency=0.25, max_concurrency=16)
 
 @app.route('/')
 def index():
-    connection = get_db_connection()
-    try:
-        with connection.cursor() as cur:
-            cur.execute("SELECT * FROM flaskapp")  
-            results = cur.fetchall()
-    finally:
-        connection.close()
-
-    return jsonify(results)   
+    results = router.execute("SELECT * FROM flaskapp", session=session)
+    return jsonify(results)
+
+@app.route('/db-status')
+def db_status():
+    """Which backends are up and how many connections each has open."""
+    return jsonify(router.status())
 
 if __name__ == '__main__':
     app.run(debug=True)
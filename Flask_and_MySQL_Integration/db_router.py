@@ -0,0 +1,226 @@
+import itertools
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Statements that never modify data - everything else goes to the primary
+READ_ONLY_KEYWORDS = ('SELECT', 'SHOW', 'DESCRIBE', 'DESC', 'EXPLAIN')
+# ... unless they take locks or write files, which only make sense on the primary
+LOCKING_READ = re.compile(
+    r'\bFOR\s+UPDATE\b|\bLOCK\s+IN\s+SHARE\s+MODE\b|\bFOR\s+SHARE\b|\bINTO\s+(?:OUTFILE|DUMPFILE)\b',
+    re.I
+)
+# EXPLAIN ANALYZE runs the statement, and EXPLAIN of a write is only safe on the primary
+EXPLAIN_WRITE = re.compile(
+    r'^(?:EXPLAIN|DESCRIBE|DESC)\b.*?\b(?:ANALYZE|INSERT|UPDATE|DELETE|REPLACE)\b', re.I | re.S
+)
+# MySQL runs the body of /*! ... */ and /*+ ... */ holds optimizer hints, so
+# neither is stripped like a plain comment - any statement with one goes to the primary
+EXECUTABLE_COMMENT = re.compile(r'/\*[!+]')
+LEADING_COMMENTS = re.compile(r'^\s*(?:(?:--|#)[^\n]*(?:\n|$)\s*|/\*(?![!+]).*?\*/\s*)*', re.S)
+
+
+def is_read_only(sql):
+    """True if the statement can safely run on a replica."""
+    statement = LEADING_COMMENTS.sub('', sql, count=1)
+    if EXECUTABLE_COMMENT.search(statement):
+        return False
+    keyword = statement.split(None, 1)[0].upper() if statement.strip() else ''
+    return (
+        keyword in READ_ONLY_KEYWORDS
+        and not LOCKING_READ.search(statement)
+        and not EXPLAIN_WRITE.search(statement)
+    )
+
+
+# ============================================
+# BACKEND (one database server)
+# ============================================
+
+class Backend:
+    """
+    One database server - the primary or a replica.
+    `connect` is any function returning a DB-API connection, e.g.
+    lambda: pymysql.connect(host='replica1', ...) or lambda: sqlite3.connect('r1.db')
+    """
+
+    def __init__(self, name, connect):
+        self.name = name
+        self.connect = connect
+        self.healthy = True
+        self.active = 0          # connections currently checked out
+        self.failures = 0        # consecutive failed checks / connects
+        self.successes = 0       # consecutive passed checks while ejected
+
+    def __repr__(self):
+        state = 'up' if self.healthy else 'ejected'
+        return f'<Backend {self.name} {state} active={self.active}>'
+
+
+# ============================================
+# ROUTER
+# ============================================
+
+class ConnectionRouter:
+    """
+    Sends read-only statements to replicas and everything else to the primary.
+    - strategy: 'round_robin' or 'least_loaded' (fewest open connections)
+    - sticky_seconds: after a write, reads from the same session go to the
+      primary for this long (read-your-writes)
+    - A replica is ejected after `failure_threshold` consecutive failures and
+      readmitted after `readmit_threshold` consecutive passed health checks
+    - With no healthy replica left, reads fall back to the primary
+    """
+
+    def __init__(self, primary, replicas=(), strategy='round_robin', sticky_seconds=5.0,
+                 failure_threshold=1, readmit_threshold=2, health_query='SELECT 1'):
+        if strategy not in ('round_robin', 'least_loaded'):
+            raise ValueError(f'Unknown strategy: {strategy}')
+        self.primary = Backend('primary', primary)
+        self.replicas = [Backend(f'replica{i}', connect) for i, connect in enumerate(replicas, 1)]
+        self.strategy = strategy
+        self.sticky_seconds = sticky_seconds
+        self.failure_threshold = failure_threshold
+        self.readmit_threshold = readmit_threshold
+        self.health_query = health_query
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._health_thread = None
+
+    # ---------- choosing a backend ----------
+
+    def healthy_replicas(self):
+        return [replica for replica in self.replicas if replica.healthy]
+
+    def _pick_replica(self):
+        candidates = self.healthy_replicas()
+        if not candidates:
+            return None
+        # Rotate the list every time so equally loaded replicas take turns
+        start = next(self._counter) % len(candidates)
+        candidates = candidates[start:] + candidates[:start]
+        if self.strategy == 'least_loaded':
+            return min(candidates, key=lambda replica: replica.active)
+        return candidates[0]
+
+    def route(self, sql, session=None):
+        """
+        Pick the backend for `sql`. `session` is any dict-like (e.g. flask.session);
+        reads stay on the primary for a while after mark_write() was called on it.
+        """
+        if not is_read_only(sql):
+            return self.primary
+        if session is not None:
+            last_write = session.get('db_last_write')
+            if last_write and time.time() - last_write < self.sticky_seconds:
+                return self.primary
+        with self._lock:
+            return self._pick_replica() or self.primary
+
+    def mark_write(self, session):
+        """Record a successful write so this session reads its own writes."""
+        if session is not None:
+            session['db_last_write'] = time.time()
+
+    # ---------- using a backend ----------
+
+    @contextmanager
+    def connection(self, sql, session=None):
+        """
+        Open a connection on the right backend for `sql`, close it afterwards.
+        Callers that write through it should call mark_write() after committing.
+        """
+        backend = self.route(sql, session)
+        try:
+            conn = backend.connect()
+        except Exception:
+            if backend is self.primary:
+                raise
+            # Passive health check - count the failure and fall back to the primary
+            self._record_failure(backend)
+            backend = self.primary
+            conn = backend.connect()
+
+        with self._lock:
+            backend.active += 1
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                backend.active -= 1
+            conn.close()
+
+    def execute(self, sql, args=None, session=None):
+        """Run one statement and return its rows ([] if it has none). Writes are committed."""
+        read_only = is_read_only(sql)
+        with self.connection(sql, session) as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(sql, args or ())
+                # Some drivers (e.g. psycopg2) raise on fetchall() without a result set
+                rows = cur.fetchall() if cur.description is not None else []
+                if not read_only:
+                    conn.commit()
+            finally:
+                cur.close()
+        if not read_only:
+            self.mark_write(session)
+        return rows
+
+    # ---------- health checks ----------
+
+    def _record_failure(self, replica):
+        with self._lock:
+            replica.successes = 0
+            replica.failures += 1
+            if replica.failures >= self.failure_threshold:
+                replica.healthy = False
+
+    def _record_success(self, replica):
+        with self._lock:
+            replica.failures = 0
+            if not replica.healthy:
+                replica.successes += 1
+                if replica.successes >= self.readmit_threshold:
+                    replica.healthy = True
+                    replica.successes = 0
+
+    def check_health(self):
+        """Run the health query on every replica (ejected ones too)."""
+        for replica in self.replicas:
+            try:
+                conn = replica.connect()
+                try:
+                    cur = conn.cursor()
+                    cur.execute(self.health_query)
+                    cur.fetchall()
+                    cur.close()
+                finally:
+                    conn.close()
+            except Exception:
+                self._record_failure(replica)
+            else:
+                self._record_success(replica)
+
+    def start_health_checks(self, interval=5.0):
+        """Run check_health() every `interval` seconds in a daemon thread."""
+        if self._health_thread is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.check_health()
+
+        self._health_thread = threading.Thread(target=loop, name='db-health-check', daemon=True)
+        self._health_thread.start()
+
+    def status(self):
+        """Snapshot of every backend - handy for a debug endpoint."""
+        with self._lock:
+            return [
+                {'name': backend.name, 'healthy': backend.healthy, 'active': backend.active}
+                for backend in [self.primary] + self.replicas
+            ]
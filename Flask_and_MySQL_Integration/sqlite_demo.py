@@ -0,0 +1,69 @@
+"""
+Try the ConnectionRouter without MySQL - three SQLite files act as the
+primary and two replicas. Each file has a `server` table holding its own
+name, so every read shows which backend answered.
+
+Run:
+    python sqlite_demo.py
+"""
+import os
+import sqlite3
+import tempfile
+
+from db_router import ConnectionRouter
+
+
+def sqlite_connector(path):
+    # mode=rw fails when the file is missing, like a replica that is down
+    return lambda: sqlite3.connect(f'file:{path}?mode=rw', uri=True)
+
+
+def create_db(path, name):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE server (name TEXT)')
+    conn.execute('INSERT INTO server VALUES (?)', (name,))
+    conn.commit()
+    conn.close()
+
+
+def who(router, session=None):
+    return router.execute('SELECT name FROM server', session=session)[0][0]
+
+
+def main():
+    folder = tempfile.mkdtemp()
+    paths = {name: os.path.join(folder, f'{name}.db') for name in ('primary', 'replica1', 'replica2')}
+    for name, path in paths.items():
+        create_db(path, name)
+
+    router = ConnectionRouter(
+        primary=sqlite_connector(paths['primary']),
+        replicas=[sqlite_connector(paths['replica1']), sqlite_connector(paths['replica2'])],
+        strategy='round_robin',
+        sticky_seconds=1
+    )
+
+    print('1. Round-robin reads:', [who(router) for _ in range(4)])
+
+    session = {}
+    try:
+        router.execute("UPDATE missing_table SET x = 1", session=session)
+    except sqlite3.Error:
+        pass
+    print('2. Read after a failed write (not sticky):', who(router, session))
+    router.execute("UPDATE server SET name = 'primary (written)'", session=session)
+    print('   Read right after a write (sticky):', who(router, session))
+    print('   Read from another session:', who(router))
+
+    os.rename(paths['replica2'], paths['replica2'] + '.down')
+    print('3. replica2 down, reads:', [who(router) for _ in range(4)])
+    print('   Status:', router.status())
+
+    os.rename(paths['replica2'] + '.down', paths['replica2'])
+    router.check_health()
+    router.check_health()  # readmit_threshold=2 passed checks
+    print('4. replica2 back, reads:', [who(router) for _ in range(4)])
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,31 @@
+import os
+import sys
+from collections import Counter
+
+import click
 from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, false, func, inspect, select, update
+
+# The admission control extension lives in ../Flask_Admission_Control
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Flask_Admission_Control'))
+from admission import AdmissionControl
 
 
 app = Flask(__name__)
-# Configure SQLite database
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
+# Configure SQLite database (DATABASE_URL overrides it, e.g. 'sqlite://' for in-memory)
+# Its own file - one-to-many-relation.py uses database.db with a users table
+# that has no aggregate columns and doesn't run the listeners below
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///many_to_many.db')
 db = SQLAlchemy(app)
 
+# getUsers / get_posts / getRoles load whole tables - give them bounded budgets
+# so a burst against them can't slow down cheap routes like '/'
+admission = AdmissionControl(app)
+for endpoint in ('getUsers', 'get_posts', 'getRoles'):
+    admission.set_limit(endpoint, concurrency=4, queue_size=8, timeout=0.5,
+                        target_latency=0.25, max_concurrency=8)
+
 # ============================================
 # MODEL DEFINITIONS
 # ============================================
@@ -18,11 +37,19 @@ class User(db.Model):
     - One-to-One with Profile (via profile relationship)
     - One-to-Many with Post (via posts relationship)
     - Many-to-Many with Role (via roles relationship through user_roles table)
+    Aggregates (kept up to date by the flush listener below):
+    - post_count, latest_post_id, has_profile
     """
     __tablename__ = "users"
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50))
     
+    # Denormalized aggregates - never set these by hand
+    # server_default too, so INSERTs that bypass the ORM still get a value
+    post_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    latest_post_id = db.Column(db.Integer)
+    has_profile = db.Column(db.Boolean, nullable=False, default=False, server_default=false())
+    
     # One-to-One relationship with Profile
     # uselist=False ensures only one profile per user
     profile = db.relationship("Profile", back_populates="user", uselist=False)
@@ -35,6 +62,11 @@ class User(db.Model):
     # secondary='user_roles' uses the junction table for many-to-many
     # lazy='dynamic' returns a queryable collection for efficient filtering
     roles = db.relationship('Role', backref='users', secondary='user_roles', lazy='dynamic')
+    
+    # Read-only link to the newest post, no ForeignKey to avoid a users <-> posts cycle
+    latest_post = db.relationship(
+        "Post", primaryjoin="foreign(User.latest_post_id) == Post.id", viewonly=True
+    )
 
 class Profile(db.Model):
     """
@@ -62,16 +94,20 @@ class Post(db.Model):
     description = db.Column(db.Text, nullable=False)
     
     # ForeignKey links to User.id, nullable=False ensures every post has an author
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    # index=True keeps "newest post of a user" a cheap index lookup
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
 
 class Role(db.Model):
     """
     Role model - represents user roles for authorization.
     Many-to-Many relationship with User through user_roles junction table.
+    Aggregates (kept up to date by the flush listener below):
+    - user_count
     """
     __tablename__ = "roles"
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
+    user_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
 # ============================================
 # MANY-TO-MANY JUNCTION TABLE
@@ -83,6 +119,212 @@ user_roles = db.Table('user_roles',
     db.Column('role_id', db.Integer, db.ForeignKey('roles.id'), primary_key=True)
 )
 
+# ============================================
+# AGGREGATE MAINTENANCE
+# ============================================
+# Every flush is inspected for posts, profiles and role links that were
+# added, moved or removed. The aggregates are then adjusted with
+# "SET col = col + delta" style UPDATEs on the same connection, so they
+# commit or roll back together with the change that caused them.
+
+def _owner_changed(obj):
+    """True if a persistent post/profile is being moved to another user."""
+    attrs = inspect(obj).attrs
+    relation = attrs.author if isinstance(obj, Post) else attrs.user
+    return attrs.user_id.history.has_changes() or relation.history.has_changes()
+
+
+def _stored_owners(session, objs):
+    """
+    user_id of each post/profile as currently stored in the database (before
+    this flush writes) - one "WHERE id IN (...)" query per table.
+    """
+    ids_by_table = {}
+    for obj in objs:
+        ids_by_table.setdefault(obj.__table__, set()).add(obj.id)
+    owners = {}
+    for table, ids in ids_by_table.items():
+        rows = session.execute(select(table.c.id, table.c.user_id).where(table.c.id.in_(ids)))
+        owners.update(((table, id_), user_id) for id_, user_id in rows)
+    return {obj: owners.get((obj.__table__, obj.id)) for obj in objs}
+
+
+@event.listens_for(db.session, 'before_flush')
+def capture_old_owners(session, flush_context, instances):
+    """
+    Record what the flush is about to change while the old rows still exist:
+    the previous owner of every added, moved or deleted post/profile, and the
+    roles of every deleted user (its user_roles rows go away in the flush).
+    The loaded attributes can't be trusted for this - after a commit they are
+    expired, so the old owner is read from the database instead.
+    """
+    moves = []
+    existing = []
+    deleted_roles = Counter()
+    with session.no_autoflush:
+        for obj in session.new:
+            if isinstance(obj, (Post, Profile)):
+                moves.append((obj, None))
+        for obj in session.dirty:
+            if isinstance(obj, (Post, Profile)) and _owner_changed(obj):
+                existing.append(obj)
+        for obj in session.deleted:
+            if isinstance(obj, (Post, Profile)):
+                existing.append(obj)
+            elif isinstance(obj, User):
+                for role in obj.roles:
+                    deleted_roles[role.id] -= 1
+        if existing:
+            moves.extend(_stored_owners(session, existing).items())
+    # Assigned fresh on every flush, so nothing carries over from a failed one
+    session.info['owner_moves'] = moves
+    session.info['deleted_user_roles'] = deleted_roles
+    session.info['stale_aggregates'] = []
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def forget_captured_changes(session, previous_transaction):
+    for key in ('owner_moves', 'deleted_user_roles', 'stale_aggregates'):
+        session.info.pop(key, None)
+
+
+def _role_deltas(session):
+    """Change in user count per role id from user.roles / role.users edits."""
+    deltas = Counter(session.info.pop('deleted_user_roles', Counter()))
+    for user in list(session.new) + list(session.dirty):
+        if isinstance(user, User):
+            history = inspect(user).attrs.roles.history
+            for role in history.added:
+                deltas[role.id] += 1
+            for role in history.deleted:
+                deltas[role.id] -= 1
+    return deltas
+
+
+@event.listens_for(db.session, 'after_flush')
+def update_aggregates(session, flush_context):
+    users = User.__table__
+    posts = Post.__table__
+    profiles = Profile.__table__
+    roles = Role.__table__
+
+    post_deltas = Counter()
+    profile_users = set()
+    for obj, old_user_id in session.info.pop('owner_moves', []):
+        new_user_id = None if obj in session.deleted else obj.user_id
+        if old_user_id == new_user_id:
+            continue
+        if isinstance(obj, Post):
+            post_deltas[old_user_id] -= 1
+            post_deltas[new_user_id] += 1
+        else:
+            profile_users.update((old_user_id, new_user_id))
+    post_deltas.pop(None, None)
+    profile_users.discard(None)
+
+    for user_id, delta in post_deltas.items():
+        if delta:
+            session.execute(
+                update(users).where(users.c.id == user_id)
+                .values(post_count=users.c.post_count + delta)
+            )
+    if post_deltas:
+        # Newest post = highest id, an index lookup on posts.user_id
+        newest = (
+            select(func.max(posts.c.id))
+            .where(posts.c.user_id == users.c.id)
+            .scalar_subquery()
+        )
+        session.execute(
+            update(users).where(users.c.id.in_(post_deltas)).values(latest_post_id=newest)
+        )
+
+    if profile_users:
+        # Re-derived rather than toggled, so replacing a profile can't end up False
+        exists = select(profiles.c.id).where(profiles.c.user_id == users.c.id).exists()
+        session.execute(
+            update(users).where(users.c.id.in_(profile_users)).values(has_profile=exists)
+        )
+
+    role_deltas = _role_deltas(session)
+    for role_id, delta in role_deltas.items():
+        if delta:
+            session.execute(
+                update(roles).where(roles.c.id == role_id)
+                .values(user_count=roles.c.user_count + delta)
+            )
+
+    # Loaded objects still hold the old values - refresh them once the flush is done
+    stale = session.info.setdefault('stale_aggregates', [])
+    stale.extend((User, user_id) for user_id in set(post_deltas) | profile_users)
+    stale.extend((Role, role_id) for role_id in role_deltas)
+
+
+@event.listens_for(db.session, 'after_flush_postexec')
+def expire_aggregates(session, flush_context):
+    for model, ident in session.info.pop('stale_aggregates', []):
+        obj = session.identity_map.get(session.identity_key(model, ident))
+        if obj is not None:
+            if model is User:
+                session.expire(obj, ['post_count', 'latest_post_id', 'has_profile'])
+            else:
+                session.expire(obj, ['user_count'])
+
+
+def check_aggregates(rebuild=False):
+    """
+    Recompute every aggregate from the base tables and compare.
+    Returns a list of mismatches; with rebuild=True they are also fixed.
+    """
+    post_counts = dict(
+        db.session.query(Post.user_id, func.count(Post.id)).group_by(Post.user_id)
+    )
+    latest_posts = dict(
+        db.session.query(Post.user_id, func.max(Post.id)).group_by(Post.user_id)
+    )
+    profile_owners = {user_id for (user_id,) in db.session.query(Profile.user_id)}
+    user_counts = dict(
+        db.session.query(user_roles.c.role_id, func.count()).group_by(user_roles.c.role_id)
+    )
+
+    mismatches = []
+    for user in User.query.all():
+        expected = {
+            'post_count': post_counts.get(user.id, 0),
+            'latest_post_id': latest_posts.get(user.id),
+            'has_profile': user.id in profile_owners,
+        }
+        for field, value in expected.items():
+            if getattr(user, field) != value:
+                mismatches.append(f"user {user.id} {field}: stored {getattr(user, field)}, actual {value}")
+                if rebuild:
+                    setattr(user, field, value)
+    for role in Role.query.all():
+        expected = user_counts.get(role.id, 0)
+        if role.user_count != expected:
+            mismatches.append(f"role {role.id} user_count: stored {role.user_count}, actual {expected}")
+            if rebuild:
+                role.user_count = expected
+
+    if rebuild:
+        db.session.commit()
+    return mismatches
+
+
+@app.cli.command('check-aggregates')
+@click.option('--rebuild', is_flag=True, help='Fix any mismatches found.')
+def check_aggregates_command(rebuild):
+    """Verify (or rebuild) the denormalized aggregates."""
+    mismatches = check_aggregates(rebuild=rebuild)
+    for line in mismatches:
+        click.echo(line)
+    if not mismatches:
+        click.echo("All aggregates are consistent.")
+    elif rebuild:
+        click.echo(f"Rebuilt {len(mismatches)} aggregate value(s).")
+    else:
+        raise SystemExit(1)
+
 # Create all tables within application context
 with app.app_context():
     # db.drop_all()  # Uncomment to drop and recreate tables
@@ -215,6 +457,36 @@ def getRoles():
         role_list.append(role_data)
     return jsonify(role_list)
 
+@app.route('/users/summary')
+def getUsersSummary():
+    """
+    Route to retrieve per-user aggregates without loading any collections.
+    Reads the denormalized columns - one row per user, newest post joined in.
+    """
+    users = User.query.options(db.joinedload(User.latest_post)).all()
+    user_list = []
+    for user in users:
+        user_list.append({
+            "id": user.id,
+            "name": user.name,
+            "post_count": user.post_count,
+            "has_profile": user.has_profile,
+            "latest_post": {
+                "id": user.latest_post.id,
+                "title": user.latest_post.title
+            } if user.latest_post else None
+        })
+    return jsonify({'message': user_list})
+
+@app.route('/roles/summary')
+def getRolesSummary():
+    """Route to retrieve the number of users per role from Role.user_count."""
+    roles = Role.query.all()
+    return jsonify([
+        {"id": role.id, "name": role.name, "user_count": role.user_count}
+        for role in roles
+    ])
+
 @app.route('/profiles')
 def getProfile():
     """
@@ -263,6 +535,15 @@ SQLAlchemy Relationship Types:
    - Access: user.roles or role.users
    - lazy='dynamic' for queryable collections (efficient for large datasets)
 
+4. DENORMALIZED AGGREGATES (post_count, latest_post_id, has_profile, user_count):
+   - Stored on the row they describe, so summaries never load collections
+   - Updated incrementally in the after_flush event, inside the same transaction
+   - Verify/repair with: flask --app many-to-many-relation check-aggregates [--rebuild]
+   - Edge cases (moves, swaps, profile replacement, rollback): python verify_aggregates.py
+   - Existing databases need the new columns (recreate tables), then --rebuild
+   - Uses many_to_many.db, not the database.db of one-to-many-relation.py: writes
+     from that app skip these listeners, so the aggregates would go stale
+
 Key Concepts:
 - back_populates: Explicitly links two relationships bidirectionally
 - backref: Automatically creates reverse relationship
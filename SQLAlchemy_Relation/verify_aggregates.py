@@ -0,0 +1,88 @@
+"""
+Runs the aggregate maintenance in many-to-many-relation.py through the cases
+that are easy to get wrong and asserts check_aggregates() finds nothing after
+each one. Uses an in-memory database, so no .db file is touched.
+
+Run:
+    python verify_aggregates.py
+"""
+import importlib.util
+import os
+
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+spec = importlib.util.spec_from_file_location('m2m', os.path.join(HERE, 'many-to-many-relation.py'))
+m2m = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(m2m)
+
+db, User, Profile, Post, Role = m2m.db, m2m.User, m2m.Profile, m2m.Post, m2m.Role
+
+
+def consistent(step):
+    mismatches = m2m.check_aggregates()
+    assert mismatches == [], f"{step}: {mismatches}"
+    print(f"ok  {step}")
+
+
+def main():
+    client = m2m.app.test_client()
+    client.get('/user-add')
+    client.get('/user-add')
+    client.get('/post-add')
+
+    with m2m.app.app_context():
+        consistent("seed: two users with profiles and roles, three posts")
+
+        # Objects are expired after every commit, so old owners are never loaded
+        user1, user2 = User.query.order_by(User.id).all()
+        post = Post.query.order_by(Post.id).first()
+        db.session.commit()
+        post.user_id = user2.id
+        db.session.commit()
+        consistent("move a post by setting user_id")
+
+        post.author = user1
+        db.session.commit()
+        consistent("move a post back by setting author")
+
+        db.session.add(Post(title="Mine", description="user2's post", user_id=user2.id))
+        db.session.commit()
+        first = Post.query.filter_by(user_id=user1.id).first()
+        second = Post.query.filter_by(user_id=user2.id).first()
+        db.session.commit()
+        first.author, second.author = user2, user1
+        db.session.commit()
+        consistent("two users swap posts")
+
+        user1.profile = Profile(bio="Replaced bio")
+        db.session.commit()
+        consistent("replace a user's profile")
+
+        db.session.delete(user2.profile)
+        db.session.commit()
+        consistent("delete a profile")
+
+        # Deleting a user who still has posts fails (posts.user_id is NOT NULL)
+        db.session.delete(user1)
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+        else:
+            raise AssertionError("expected the delete to fail")
+        user2.roles.append(Role.query.first())
+        db.session.commit()
+        consistent("failed user delete, rollback, then another change")
+
+        db.session.delete(Post.query.order_by(Post.id.desc()).first())
+        role = Role.query.first()
+        role.users.remove(user1)
+        db.session.commit()
+        consistent("delete the newest post and a role link from the role side")
+
+    print("All aggregate checks passed.")
+
+
+if __name__ == '__main__':
+    main()